@@ -0,0 +1,18 @@
+#!/bin/sh
+# Launcher for self-hosted deploys only; Streamlit Cloud starts the app itself
+# and never runs this. Preloads jemalloc and pins the app to the first NUMA
+# node when the host provides them (install libjemalloc2/numactl yourself),
+# otherwise starts streamlit normally.
+JEMALLOC=/usr/lib/x86_64-linux-gnu/libjemalloc.so.2
+if [ -f "$JEMALLOC" ]; then
+    export LD_PRELOAD="$JEMALLOC${LD_PRELOAD:+:$LD_PRELOAD}"
+    export MALLOC_CONF="oversize_threshold:1,background_thread:true,metadata_thp:auto"
+fi
+
+# Docker's default seccomp profile blocks set_mempolicy/mbind, so check that
+# the binding actually works before relying on it
+if command -v numactl >/dev/null 2>&1 &&
+        numactl --cpunodebind=0 --membind=0 true >/dev/null 2>&1; then
+    exec numactl --cpunodebind=0 --membind=0 streamlit run app.py "$@"
+fi
+exec streamlit run app.py "$@"